@@ -1,10 +1,13 @@
 """Configuration utilities. Importable without PyTorch installed."""
 
 import babyseg
+import concurrent.futures
+import datetime
 import functools
 import importlib
 import json
 import logging
+import operator
 import os
 import pathlib
 import socket
@@ -12,6 +15,12 @@ import subprocess
 import sys
 
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
 logger = logging.getLogger(__name__)
 _cache = {}
 DEFAULTS = 'config/defaults.json'
@@ -38,21 +47,23 @@ def load(*files):
 
     """
     def read(path):
-        with open(path) as f:
-            d = json.load(f)
+        d = read_json(path)
         if isinstance(d, dict):
             return d
         raise ValueError(f'file "{path}" does not specify a dict')
 
     def merge(old, new):
-        for k, v in new.items():
-            if any(not isinstance(x, dict) for x in (old.get(k), v)):
-                old[k] = v
-            elif v.pop('clear', False):
-                old[k] = v
-                logger.info('cleared configuration entry "%s"', k)
-            else:
-                old[k] = merge(old[k], v)
+        stack = [(old, new)]
+        while stack:
+            o, n = stack.pop()
+            for k, v in n.items():
+                if not isinstance(o.get(k), dict) or not isinstance(v, dict):
+                    o[k] = v
+                elif v.pop('clear', False):
+                    o[k] = v
+                    logger.info('cleared configuration entry "%s"', k)
+                else:
+                    stack.append((o[k], v))
 
         return old
 
@@ -77,6 +88,36 @@ def load(*files):
     return out
 
 
+def read_json(path):
+    """Parse a JSON file, using the faster `orjson` parser if available.
+
+    Falls back to the standard parser for content that `orjson` rejects, such
+    as NaN or infinite values and byte order marks. Integers that do not fit
+    in 64 bits become floats with `orjson`.
+
+    Parameters
+    ----------
+    path : os.PathLike
+        JSON file.
+
+    Returns
+    -------
+    object
+        Deserialized content.
+
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(data)
+
+
 def build(f, /, *args, instance=True, **kwargs):
     """Build a class instance or partial function.
 
@@ -125,11 +166,13 @@ def build(f, /, *args, instance=True, **kwargs):
         if not module:
             raise ValueError(f'entity name "{name}" does not specify a module')
 
-        # Import.
+        # Import, once per entity.
         ar = f.get('args', [])
         kw = f.get('kwargs', {})
-        module = importlib.import_module(module)
-        f = getattr(module, name)
+        key = ('build', module, name)
+        if key not in _cache:
+            _cache[key] = getattr(importlib.import_module(module), name)
+        f = _cache[key]
         logger.debug('extracted %s from %s', f, module)
         if not callable(f):
             raise TypeError(f'entity {f} at "{module}.{name}" is not callable')
@@ -193,9 +236,14 @@ def load_model(
         except (ValueError, TypeError):
             path = babyseg.state.list(config)[-1] if init == 'latest' else init
 
-        # Avoid error if CUDA unavailable.
-        device = next(model.parameters()).device
-        state = torch.load(path, weights_only=True, map_location=device)
+        # Map into host memory, avoiding error if CUDA unavailable. Loading
+        # the state copies it to the device of the model.
+        state = torch.load(
+            path,
+            weights_only=True,
+            mmap=True,
+            map_location='cpu',
+        )
         model.load_state_dict(state.get(key, state))
         logger.info('loaded checkpoint "%s"', path)
 
@@ -218,26 +266,26 @@ def argparse(config, /, *options):
 
     """
     def cast(x):
-        if x == 'true':
-            return True
-        if x == 'false':
-            return False
+        if x in bools:
+            return bools[x]
 
-        for t in (int, float, str):
+        for t in (int, float):
             try:
                 return t(x)
             except ValueError:
                 pass
 
+        return x
+
+    bools = {'true': True, 'false': False}
     for option in options:
         logger.debug('parsing option %s', option)
-        try:
-            keys, value = option.split('=')
-            *keys, last = keys.split(':')
-        except ValueError as e:
-            raise ValueError(f'option "{option}" has invalid format') from e
+        keys, sep, value = option.partition('=')
+        if not sep or '=' in value:
+            raise ValueError(f'option "{option}" has invalid format')
 
         # Descend or error out.
+        *keys, last = keys.split(':')
         sub = config
         for k in keys:
             sub = sub[k]
@@ -308,7 +356,7 @@ def qualify_path(path):
     return p
 
 
-def git_status(path, *pathspec, timeout=10):
+def git_status(path, *pathspec, branch=False, timeout=10):
     """Fetch the working tree status of a Git repository.
 
     Parameters
@@ -317,6 +365,8 @@ def git_status(path, *pathspec, timeout=10):
         Git repository path.
     *pathspec : str, optional
         Limit the scope of `git status`.
+    branch : bool, optional
+        Switch to version-2 format, with branch headers starting with '#'.
     timeout : int, optional,
         Timeout in seconds.
 
@@ -326,8 +376,13 @@ def git_status(path, *pathspec, timeout=10):
         Output of `git status --porcelain`.
 
     """
+    # Skip upstream comparison, which can take long on diverged branches.
+    form = ('--porcelain',)
+    if branch:
+        form = ('--porcelain=v2', '--branch', '--no-ahead-behind')
+
     p = subprocess.run(
-        ('git', 'status', '--porcelain', '--', *pathspec),
+        ('git', 'status', *form, '--', *pathspec),
         capture_output=True,
         cwd=pathlib.Path(path).expanduser(),
         timeout=timeout,
@@ -366,18 +421,23 @@ def git_hash(path, *pathspec, short=False, timeout=10):
         If `git status` reports uncommitted change.
 
     """
-    # Working tree status.
+    # Working tree status. Headers include the checked-out commit.
     path = pathlib.Path(path).expanduser()
-    if git_status(path, *pathspec, timeout=timeout):
+    status = git_status(path, *pathspec, branch=True, timeout=timeout)
+    status = status.splitlines()
+    if any(not line.startswith('#') for line in status):
         raise ValueError(f'uncommitted change in repository "{path}"')
 
-    # Checked-out commit.
-    hash = ('git', 'rev-parse', 'HEAD')
-    if short:
-        hash = (*hash[:-1], '--short', *hash[-1:])
+    # Checked-out commit. Abbreviate with Git for unambiguous short hashes.
+    prefix = '# branch.oid '
+    hash = next(x.removeprefix(prefix) for x in status if x.startswith(prefix))
+    if hash == '(initial)':
+        raise ValueError(f'no commit in repository "{path}"')
+    if not short:
+        return hash
 
     return subprocess.run(
-        hash,
+        ('git', 'rev-parse', '--short', hash),
         capture_output=True,
         cwd=path,
         timeout=timeout,
@@ -412,29 +472,43 @@ def env(config, /, test=False):
         'sys.path': sys.path,
         'hostname': socket.gethostname(),
     }
-    for c in ('date', 'uptime'):
-        out[c] = subprocess.check_output(c, text=True).strip()
+    out['date'] = datetime.datetime.now().astimezone().isoformat()
+    try:
+        with open('/proc/uptime') as f:
+            sec = float(f.read().split()[0])
+    except FileNotFoundError:
+        # Boot time as "{ sec = 1700000000, usec = 0 } ..." on macOS.
+        cmd = ('sysctl', '-n', 'kern.boottime')
+        boot = subprocess.check_output(cmd, text=True)
+        boot = boot.split('sec =')[1].split(',')[0]
+        sec = datetime.datetime.now().timestamp() - int(boot)
+    out['uptime'] = str(datetime.timedelta(seconds=round(sec)))
 
     # Git commit hashes.
     out['git-rev-parse'] = {}
     if not isinstance(config, dict):
         config = load(config)
 
-    try:
-        for f, stat in config['repositories'].items():
-            out['git-rev-parse'][f] = git_hash(f, *stat)
-    except ValueError:
-        if not test:
-            raise
+    repos = config['repositories']
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        hashes = pool.map(lambda f: git_hash(f, *repos[f]), repos)
+        try:
+            for f, h in zip(repos, hashes, strict=True):
+                out['git-rev-parse'][f] = h
+        except ValueError:
+            if not test:
+                raise
 
     # Environment variables.
     out['os.environ'] = dict(os.environ)
 
     # Packages.
+    import importlib.metadata
+
+    # Parse each metadata file once, as `Distribution.metadata` does not cache.
     dist = importlib.metadata.distributions()
-    out['packages'] = {}
-    for d in sorted(dist, key=lambda d: d.metadata['name']):
-        out['packages'][d.metadata['name']] = d.version
+    dist = ((d.metadata['name'], d.version) for d in dist)
+    out['packages'] = dict(sorted(dist, key=operator.itemgetter(0)))
 
     _cache['env'] = out
     return out
@@ -1,8 +1,9 @@
 """Data abstraction utilities. Importable without PyTorch installed."""
 
+import babyseg
 import concurrent.futures
 import glob
-import json
+import itertools
 import logging
 import os
 import pathlib
@@ -50,12 +51,10 @@ def slurm_map(work, samples, *args, **kwargs):
     worker_num = int(os.getenv('SLURM_ARRAY_TASK_COUNT', 1))
     logger.info('identifying as worker %d of %d', worker_id, worker_num)
 
-    # Shard.
-    def keep(ind):
-        return ind % worker_num == worker_id - 1
-
+    # Shard. Take every n-th sample, starting from the worker index.
+    if worker_num > 1:
+        samples = itertools.islice(samples, worker_id - 1, None, worker_num)
     samples = list(samples)
-    samples = [d for i, d in enumerate(samples) if keep(i)]
     logger.info('retaining %d samples for worker %d', len(samples), worker_id)
 
     # Mapping.
@@ -69,7 +68,7 @@ def slurm_map(work, samples, *args, **kwargs):
     return results
 
 
-def read_samples(files, which=None):
+def read_samples(files, which=None, threads=None):
     """Read data samples from dataset split files.
 
     Parameters
@@ -78,6 +77,8 @@ def read_samples(files, which=None):
         JSON files.
     which : str or sequence of str
         Only return samples that have specific image types.
+    threads : int, optional
+        Maximum number of workers.
 
     Returns
     -------
@@ -91,11 +92,9 @@ def read_samples(files, which=None):
     if isinstance(which, str):
         which = [which]
 
-    def read(path):
-        with open(path) as f:
-            return json.load(f)
-
-    samples = [Sample(d) for f in files for d in read(f)]
+    with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+        data = pool.map(babyseg.config.read_json, files)
+        samples = [Sample(d) for sub in data for d in sub]
     logger.info('found %d samples in files %s', len(samples), files)
 
     if which is not None:
@@ -113,8 +112,25 @@ class Sample:
     of a class. However, the class allows us to add baselines, label sets, or
     image contrasts without changing code.
 
+    Attributes
+    ----------
+    data : dict
+        Key-value pairs from JSON file.
+    folder : pathlib.Path
+        Sample directory.
+    name : str
+        Sample identifier. Defaults to the folder name.
+    image_types : tuple of str
+        Image types whose paths are accessible via `image`.
+    age : float
+        Age of the individual.
+    unit : str
+        Unit of the age.
+
     """
 
+    __slots__ = ('age', 'data', 'folder', 'image_types', 'name', 'unit')
+
     def __init__(self, data, /):
         """Initialize the sample.
 
@@ -126,6 +142,10 @@ class Sample:
         """
         self.data = data
         self.folder = pathlib.Path(data['folder'])
+        self.name = data.get('name', self.folder.name)
+        self.image_types = tuple(data['images'])
+        self.age = data['age']
+        self.unit = data['unit']
 
     def has(self, name):
         """Check if the sample has a specific image.
@@ -160,18 +180,6 @@ class Sample:
         """
         return self.folder / self.data[name]
 
-    @property
-    def image_types(self):
-        """Image types.
-
-        Returns
-        -------
-        tuple of str
-            Image types whose paths are accessible via `image`.
-
-        """
-        return tuple(self.data['images'])
-
     def label_map(self, labels='baby'):
         """Label map.
 
@@ -192,45 +200,6 @@ class Sample:
 
         return self.folder / f'labels.{labels}.nii.gz'
 
-    @property
-    def name(self):
-        """Sample name.
-
-        Returns
-        -------
-        str
-            Sample identifier.
-
-        """
-        try:
-            return self.data['name']
-        except KeyError:
-            return self.folder.name
-
-    @property
-    def age(self):
-        """Age.
-
-        Returns
-        -------
-        float
-            Age of the individual.
-
-        """
-        return self.data['age']
-
-    @property
-    def unit(self):
-        """Unit.
-
-        Returns
-        -------
-        str
-            Unit of the age.
-
-        """
-        return self.data['unit']
-
     def output(self, method, labels='baby'):
         """Prediction.
 
@@ -265,9 +234,15 @@ class Sample:
             raise ValueError('method name is empty')
 
         d = self.folder / method
-        files = d.glob('*')
-        for f in files:
-            f.unlink()
+        try:
+            with os.scandir(d) as entries:
+                for f in entries:
+                    try:
+                        os.unlink(f.path)
+                    except FileNotFoundError:
+                        pass
+        except FileNotFoundError:
+            return
 
         try:
             d.rmdir()
@@ -308,16 +283,24 @@ def load_label_maps(*pattern, threads=None):
 
     """
     import nibabel as nib
+    import numpy as np
     import torch
 
     if isinstance(pattern, (str, os.PathLike)):
         pattern = [pattern]
 
-    # Processing.
+    # Processing. Find unique values of unscaled integer data before
+    # converting it, to avoid a float round trip.
     def load(path):
-        x = nib.load(path).get_fdata()
-        x = torch.as_tensor(x, dtype=torch.float32)
-        return x.to(torch.int64).unique(), x.squeeze()
+        img = nib.load(path)
+        x = np.asanyarray(img.dataobj)
+        if np.issubdtype(x.dtype, np.integer):
+            uniq = torch.as_tensor(np.unique(x).astype(np.int64))
+            x = torch.as_tensor(x.astype(np.float32))
+        else:
+            x = torch.as_tensor(x, dtype=torch.float32)
+            uniq = x.unique().to(torch.int64)
+        return uniq, x.squeeze()
 
     pattern = tuple(map(str, pattern))
     with concurrent.futures.ThreadPoolExecutor(threads) as pool:
@@ -332,7 +315,16 @@ def load_label_maps(*pattern, threads=None):
     return torch.cat(uniq).unique(), maps
 
 
-def save_split(df, /, root, contrast, labels, path, complete=True):
+def save_split(
+    df,
+    /,
+    root,
+    contrast,
+    labels,
+    path,
+    complete=True,
+    threads=None,
+):
     """Save rows of a Polars data frame as a JSON file.
 
     Parameters
@@ -349,6 +341,8 @@ def save_split(df, /, root, contrast, labels, path, complete=True):
         Output JSON file.
     complete : bool, optional
         Only save samples that have all requested contrasts.
+    threads : int, optional
+        Maximum number of workers.
 
     Raises
     ------
@@ -363,42 +357,53 @@ def save_split(df, /, root, contrast, labels, path, complete=True):
     if isinstance(contrast, str):
         contrast = [contrast]
 
-    # Retain only the samples that have each requested contrast.
+    # Retain requested contrasts, optionally only for samples with all.
+    df = df.filter(pl.col('contrast').is_in(contrast))
     if complete:
-        keep = [df.filter(pl.col('contrast') == c)['sample'] for c in contrast]
-        keep = set.intersection(*map(set, keep))
-        df = df.filter(pl.col('sample').is_in(keep))
+        num = pl.col('contrast').n_unique().over('sample')
+        df = df.filter(num == len(set(contrast)))
 
-    df = df.filter(pl.col('contrast').is_in(contrast))
     if df.is_empty():
         ValueError(f'no rows with contrast in {contrast}')
 
-    out = {}
-    for row in df.rows(named=True):
-        # Paths.
-        sample =  row['sample']
-        folder = pathlib.Path(root) / sample
-        image = folder / row['out_image']
-        annot = folder / (labels if labels else row['out_labels'])
-        for f in (image, annot):
-            if not f.exists:
+    # Paths. Join folders with `pathlib` semantics, once per sample.
+    root = pathlib.Path(root)
+    folder = {s: str(root / s) for s in df['sample'].unique()}
+    df = df.with_columns(
+        folder=pl.col('sample').replace_strict(folder, return_dtype=pl.String),
+        annot=pl.lit(labels) if labels else pl.col('out_labels'),
+    )
+
+    # Check existence concurrently, as file systems may have high latency.
+    files = (
+        pl.concat_str('folder', x, separator=os.sep)
+        for x in ('out_image', 'annot')
+    )
+    files = df.select(f=pl.concat_list(*files).explode())['f'].unique()
+    with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+        exist = pool.map(os.path.exists, files)
+        for f, exists in zip(files, exist, strict=True):
+            if not exists:
                 raise FileNotFoundError(f'file {f} not found')
 
-        # Output dictionary.
-        if sample not in out:
-            out[sample] = {
-                'folder': str(folder),
-                'labels': annot.name,
-                'images': [row['contrast']],
-                'age': round(row['age'], ndigits=2),
-                'unit': row['unit'],
-            }
-
-        else:
-            out[sample]['images'].append(row['contrast'])
-
-        out[sample][row['contrast']] = image.name
+    # Output dictionaries. Gather contrasts and images per sample.
+    df = df.group_by('sample', maintain_order=True).agg(
+        'contrast',
+        'out_image',
+        pl.first('folder', 'annot', 'age', 'unit'),
+    )
+
+    out = []
+    for row in df.iter_rows(named=True):
+        images = zip(row['contrast'], row['out_image'], strict=True)
+        out.append({
+            'folder': row['folder'],
+            'labels': pathlib.Path(row['annot']).name,
+            'images': row['contrast'],
+            'age': round(row['age'], ndigits=2),
+            'unit': row['unit'],
+            **{c: pathlib.Path(f).name for c, f in images},
+        })
 
     # Save as a list of dictionaries.
-    out = list(out.values())
     katy.io.save(out, path)
@@ -1,7 +1,7 @@
 """Evaluation utilities."""
 
 import babyseg as bs
-import json
+import concurrent.futures
 import katy
 import logging
 import pathlib
@@ -40,9 +40,9 @@ def select_dtype(x, /):
     if x.dtype.is_floating_point or x.dtype.is_complex:
         raise TypeError(f'{x.dtype} is not an integer type')
 
-    max_val = x.max()
-    min_val = x.min()
-    logger.debug('input data spans %s to %s range', max_val, min_val)
+    # Single reduction and device synchronization.
+    min_val, max_val = (v.item() for v in torch.aminmax(x))
+    logger.debug('input data spans %s to %s range', min_val, max_val)
 
     for t in types:
         logger.debug('examining type candidate %s', t)
@@ -85,6 +85,11 @@ def segment(
     threads : int, optional
         Number of intraop threads on CPU.
 
+    Raises
+    ------
+    ValueError
+        If the configured inference precision is not supported.
+
     """
     # Inputs.
     if not isinstance(config, dict):
@@ -93,11 +98,21 @@ def segment(
         images = [images]
     logger.info('received inputs %s', images)
 
+    precision = config['eval'].get('precision', 'float32')
+    if precision not in ('float32', 'bfloat16', 'float16'):
+        raise ValueError(f'unsupported inference precision "{precision}"')
+
     # Outputs.
     if not any((out_seg, out_prob, out_lead)):
         logger.error('received no output file paths')
         exit(1)
 
+    # Read and decompress all images in the background, while building the
+    # model. Shutting down without waiting keeps submitted loads running.
+    pool = concurrent.futures.ThreadPoolExecutor(len(images))
+    volumes = pool.map(vx.load_volume, images)
+    pool.shutdown(wait=False)
+
     # Model.
     if threads is not None:
         torch.set_num_threads(threads)
@@ -105,38 +120,68 @@ def segment(
     model = bs.config.load_model(config, init=checkpoint, device=device)
     model.eval()
 
+    # Compilation only pays off when running the model many times, as shapes
+    # vary between subjects, and each new shape triggers compilation. Pass a
+    # mode like 'reduce-overhead' to replay CUDA graphs.
+    mode = config['eval'].get('compile')
+    if mode:
+        mode = None if mode is True else mode
+        logger.info('compiling model with mode "%s"', mode or 'default')
+        model = torch.compile(model, dynamic=False, mode=mode)
+
     # Lead image.
     ori = config['eval']['orientation']
     spacing = config['eval']['spacing']
-    lead = vx.load_volume(images[0]).to(device).float()
-    conf = lead.reorient(ori).crop_to_nonzero().resample(spacing)
+    lead = next(volumes)
+    conf = lead.to(device).float()
+    conf = conf.reorient(ori).crop_to_nonzero().resample(spacing)
     logger.info('reoriented lead image to "%s"', ori)
     logger.info('resampled lead image to voxel spacing %s mm', spacing)
     logger.info('cropped lead image to bounding box %s', conf.baseshape)
 
     # Shape.
     div = config['eval']['divisor']
-    shape = torch.tensor(conf.baseshape)
-    shape = shape.div(div).ceil().long().mul(div).clamp(128, 320)
+    shape = (-(-n // div) * div for n in conf.baseshape)
+    shape = tuple(min(max(n, 128), 320) for n in shape)
     conf = conf.reshape(shape)
     logger.info('reshaped lead image to %s', conf.baseshape)
     if out_lead:
         conf.save(out_lead)
         logger.info('saved conformed lead image to "%s"', out_lead)
 
-    # Resampling. Create multi-channel batch.
+    # Resampling. Fill multi-channel batch, freeing each image once copied.
+    # Images can have several frames, each of which becomes a channel.
     logger.info('conforming remaining images to lead image')
-    images = map(vx.load_volume, images[1:])
-    images = (i.to(device).float().resample_like(conf) for i in images)
-    images = vx.volume.stack(conf, *images).tensor.unsqueeze(0)
-
-    # Inference.
+    volumes = list(volumes)
+    size = sum(x.tensor.shape[0] for x in volumes)
+    size += conf.tensor.shape[0]
+    batch = conf.tensor.new_empty(1, size, *conf.baseshape)
+    i = conf.tensor.shape[0]
+    batch[0, :i] = conf.tensor
+    while volumes:
+        x = volumes.pop(0).to(device).float().resample_like(conf)
+        batch[0, i:i + x.tensor.shape[0]] = x.tensor
+        i += x.tensor.shape[0]
+    images = batch
+
+    # Inference. Autocast runs the softmax in single precision.
+    precision = getattr(torch, precision)
+    autocast = torch.autocast(
+        device_type=torch.device(device or 'cpu').type,
+        dtype=precision,
+        enabled=precision != torch.float32,
+    )
     logger.info('running model on tensor of %s', images.shape)
+    logger.info('using %s precision for inference', precision)
     with torch.no_grad():
         start = time.time()
-        out = model(images).squeeze()
+        with autocast:
+            out = model(images).squeeze().float()
         logger.info('inference took %.2f seconds', time.time() - start)
         logger.debug('received model output %s', out.shape)
+
+        # Move the lead image only now, to save device memory for inference.
+        lead = lead.to(device).float()
         out = conf.new(out).resample_like(lead)
         logger.debug('resampled model output %s', out.shape)
 
@@ -152,7 +197,7 @@ def segment(
         logger.debug('remapping one-hot to labels using "%s"', labels)
         lut = list(map(int, katy.io.load(labels)))
         lut = torch.tensor(lut, dtype=torch.uint8, device=device)
-        out = lut[out.tensor.argmax(0)]
+        out = torch.take(lut, out.tensor.argmax(0))
 
         lead.new(out).save(out_seg)
         logger.info('saved label map to "%s"', out_seg)
@@ -175,18 +220,18 @@ def remap_labels(input, mapping, output, colors=None):
     """
     # Mapping.
     logger.info('loading label mapping from "%s"', mapping)
-    with open(mapping) as f:
-        mapping = json.load(f)
-        mapping = {int(k): int(v) for k, v in mapping.items()}
-        logger.debug('using mapping %s', mapping)
+    mapping = bs.config.read_json(mapping)
+    mapping = {int(k): int(v) for k, v in mapping.items()}
+    logger.debug('using mapping %s', mapping)
 
     # Lookup table. Keep missing labels as is.
     logger.info('reading input label map "%s"', input)
     out = vx.load_volume(input).int()
     size = max(max(mapping), out.max()) + 1
     lut = torch.arange(size)
-    for old, new in mapping.items():
-        lut[old] = new
+    old = torch.tensor(tuple(mapping.keys()), dtype=lut.dtype)
+    new = torch.tensor(tuple(mapping.values()), dtype=lut.dtype)
+    lut.scatter_(0, old, new)
 
     # Recoding.
     logger.debug('constructed LUT %s', lut)
@@ -194,7 +239,7 @@ def remap_labels(input, mapping, output, colors=None):
     out = out.new(lut[out.tensor])
 
     # Output.
-    dtype = select_dtype(out)
+    dtype = select_dtype(out.tensor)
     logger.info('selected output data type %s', dtype)
     out.type(dtype).save(output)
     logger.info('saved output to "%s"', output)
@@ -281,7 +326,7 @@ def validate_sample(sample, config):
         raise ValueError(f'input not among images {sample.image_types}')
 
 
-def remap_sample(sample, config, force=False):
+def remap_sample(sample, config, force=False, threads=None):
     """Remap the labels of a sample.
 
     Parameters
@@ -292,6 +337,8 @@ def remap_sample(sample, config, force=False):
         Model configuration.
     force : bool, optional
         Override existing outputs.
+    threads : int, optional
+        Maximum number of workers. Defaults to the number of tasks, at most 4.
 
     Raises
     ------
@@ -302,18 +349,19 @@ def remap_sample(sample, config, force=False):
     method = config['cache']['name']
     native = config['eval']['native']
     labels = config['eval']['labels']
+    tasks = []
 
     # Predicted labels.
     logger.info('mapping "%s" prediction to labels %s', sample, list(labels))
     for label_set in labels:
         inp = sample.output(method, labels=native)
         out = sample.output(method, labels=label_set)
-        if out.exists() and not force:
+        if inp == out or (out.exists() and not force):
             logger.info('skipping existing sample "%s"', sample)
             continue
 
         mapping = config['eval']['mapping_pred'][label_set]
-        remap_labels(inp, mapping, out)
+        tasks.append((inp, mapping, out))
 
     # Ground-truth labels.
     logger.info('mapping "%s" ground truth to labels %s', sample, list(labels))
@@ -325,7 +373,18 @@ def remap_sample(sample, config, force=False):
             continue
 
         mapping = config['eval']['mapping_true'][label_set]
-        remap_labels(inp, mapping, out)
+        tasks.append((inp, mapping, out))
+
+    # Remapping. Outputs are distinct files that no task reads, so tasks are
+    # independent. Keep few workers: they share the intra-op thread pool of
+    # PyTorch, and remapping mostly waits on file input and output.
+    if not tasks:
+        return
+    if threads is None:
+        threads = min(len(tasks), 4)
+
+    with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda x: remap_labels(*x), tasks))
 
 
 def score_sample(sample, config, label_set, device=None, decimals=5):
@@ -366,7 +425,7 @@ def score_sample(sample, config, label_set, device=None, decimals=5):
     true = true.tensor[None, None]
     pred = pred.tensor[None, None]
     dice = katy.metrics.dice(true, pred, labels=list(labels))
-    dice = [round(d.item(), decimals) for d in dice.squeeze().cpu()]
+    dice = [round(d, decimals) for d in dice.flatten().tolist()]
 
     return {
         'sample': sample.name,
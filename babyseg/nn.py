@@ -73,6 +73,24 @@ class GroupConv(nn.Module):
             Output of spatial size depending on arguments.
 
         """
+        # Single group: the mean is the input, and convolutions are linear.
+        # Average the weights instead of the outputs of two convolutions.
+        b, m = self.conv_b, self.conv_m
+        if x.shape[1] == 1 and b.padding_mode == 'zeros':
+            w = 0.5 * (b.weight + m.weight)
+            bias = None if b.bias is None else 0.5 * (b.bias + m.bias)
+            conv = getattr(nn.functional, f'conv{x.ndim - 3}d')
+            y = conv(
+                x.squeeze(1),
+                w,
+                bias,
+                stride=b.stride,
+                padding=b.padding,
+                dilation=b.dilation,
+                groups=b.groups,
+            )
+            return y.unsqueeze(1)
+
         m = x.mean(dim=1)  # B, C, *X
         y = x.view(-1, *x.shape[2:])  # BG, C, *X
         m = self.conv_m(m)  # B, C', *X'
@@ -158,6 +176,7 @@ class GroupNet(nn.Module):
         act=nn.ELU,
         conv=GroupConv,
         clip=(0.01, 0.99),
+        sample=None,
     ):
         """Initialize the model.
 
@@ -183,11 +202,15 @@ class GroupNet(nn.Module):
             Cross-convolution layer.
         clip : tuple of float, optional
             Clip at min-max quantiles in [0, 1] before normalizing.
+        sample : int, optional
+            Estimate quantiles from this many randomly drawn voxels per input,
+            instead of sorting all voxels. None means exact quantiles.
 
         """
         super().__init__()
         mode = {1: 'linear', 2: 'bilinear', 3: 'trilinear'}[dim]
         self.clip = clip
+        self.sample = sample
 
         # Blocks.
         conv = bs.config.build(
@@ -239,6 +262,43 @@ class GroupNet(nn.Module):
         level.append(nn.Softmax(dim=2))
         self.add = nn.Sequential(*level)
 
+    def normalize(self, x, /):
+        """Clip at quantiles estimated from a subset of voxels, and normalize.
+
+        Parameters
+        ----------
+        x : (B, G, 1, *size) torch.Tensor
+            Input of `N`-element spatial `size`.
+
+        Returns
+        -------
+        (B, G, 1, *size) torch.Tensor
+            Inputs clipped and min-max normalized into [0, 1] along space.
+
+        """
+        # Draw voxels at random with a fixed seed, for reproducible results.
+        # Strided subsets align with the axes of conformed shapes and would
+        # only sample the zero-padded edge.
+        y = x.flatten(start_dim=2)  # B, G, X
+        if y.shape[-1] > self.sample:
+            gen = torch.Generator(x.device).manual_seed(0)
+            ind = torch.randint(
+                y.shape[-1],
+                size=(self.sample,),
+                generator=gen,
+                device=x.device,
+            )
+            y = y[..., ind]
+
+        q = torch.tensor(self.clip, dtype=x.dtype, device=x.device)
+        q = torch.quantile(y, q, dim=-1)  # 2, B, G
+
+        # Clipped minimum and maximum are the quantiles.
+        size = (*x.shape[:2], *[1] * (x.ndim - 2))
+        low, upp = (v.view(size) for v in q)
+        x = x.clamp(low, upp).sub_(low)
+        return x.div_((upp - low).clamp(min=torch.finfo(x.dtype).eps))
+
     def forward(self, x, /):
         """Define the computation performed by the model call.
 
@@ -257,7 +317,10 @@ class GroupNet(nn.Module):
         with torch.no_grad():
             x = x.unsqueeze(2)
             dim = range(2, x.ndim)
-            x = kt.utility.normalize(x, dim, *self.clip)
+            if self.sample is None:
+                x = kt.utility.normalize(x, dim, *self.clip)
+            else:
+                x = self.normalize(x)
 
         # Encoding convolutions.
         enc = []
@@ -8,6 +8,7 @@ import torch
 
 
 logger = logging.getLogger(__name__)
+_cache = {}
 
 
 def load(conf, /, **kwargs):
@@ -61,7 +62,8 @@ def load(conf, /, **kwargs):
     else:
         raise ValueError(f'resume value "{resume}" not of type bool or int')
 
-    state = torch.load(init, weights_only=True)
+    # Map into host memory. Loading copies to the devices of the objects.
+    state = torch.load(init, weights_only=True, mmap=True, map_location='cpu')
     for k, v in kwargs.items():
         v.load_state_dict(state[k])
 
@@ -184,7 +186,21 @@ def list(conf, /, epoch=None):
     name = conf['cache']['name']
     folder = pathlib.Path(conf['checkpoint']['folder'])
     pattern = conf['checkpoint']['glob'].format(name=name)
-    files = sorted(folder.glob(pattern))
+
+    # Scan once per change to the directory holding checkpoints. Without a
+    # literal directory, for example if it has wildcards, always scan.
+    key = (str(folder), pattern, conf['checkpoint']['regex'])
+    try:
+        mtime = (folder / pattern).parent.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    if mtime is None or _cache.get(key, (None,))[0] != mtime:
+        files = sorted(folder.glob(pattern))
+        epochs = [bs.state.epoch(conf, f) for f in files]
+        _cache[key] = mtime, files, epochs
+
+    _, files, epochs = _cache[key]
     if not files:
         raise FileNotFoundError(f'no checkpoints for "{name}"')
 
@@ -198,7 +214,6 @@ def list(conf, /, epoch=None):
     start, stop, step = epoch
 
     # Filtering.
-    epochs = [bs.state.epoch(conf, f) for f in files]
     indices = []
     for i, e in enumerate(epochs):
         if start is not None and e < start:
@@ -4,6 +4,8 @@
 import argparse
 import babyseg
 import collections
+import fnmatch
+import functools
 import logging
 import os
 import pathlib
@@ -13,28 +15,30 @@ import sys
 logger = logging.getLogger(__name__)
 
 
-def main(argv=None):
-    """Entry point for command-line execution.
+@functools.cache
+def parser(config=None, checkpoint=None):
+    """Construct the command-line argument parser.
+
+    Build the parser once per set of defaults, to avoid repeating the setup for
+    repeated in-process calls of `main`.
 
     Parameters
     ----------
-    argv : list of str, optional
-        Command-line arguments. If None, defaults to `sys.argv[1:]`.
+    config : os.PathLike, optional
+        Default model JSON file.
+    checkpoint : os.PathLike, optional
+        Default model weights.
 
-    """
-    # Environment.
-    home = os.getenv('BABYSEG_HOME')
-    if not home:
-        print('ERROR: no environment variable BABYSEG_HOME', file=sys.stderr)
-        exit(1)
+    Returns
+    -------
+    argparse.ArgumentParser
+        Argument parser.
 
-    # Defaults.
-    home = pathlib.Path(home)
+    """
     d = collections.defaultdict(lambda: argparse.SUPPRESS)
-    d['c'] = sorted((home / 'config').glob('babyseg.*.json'))[-1]
-    d['k'] = sorted((home / 'checkpoints').glob('babyseg.*.pt'))[-1]
+    d['c'] = config
+    d['k'] = checkpoint
 
-    # Arguments.
     p = argparse.ArgumentParser(
         prog='babyseg',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -61,6 +65,40 @@ def main(argv=None):
     p.add_argument('-V', version=babyseg.__version__, action='version', help='print version and exit')
     # ruff: enable: E501
 
+    return p
+
+
+def main(argv=None):
+    """Entry point for command-line execution.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Command-line arguments. If None, defaults to `sys.argv[1:]`.
+
+    """
+    # Environment.
+    home = os.getenv('BABYSEG_HOME')
+    if not home:
+        print('ERROR: no environment variable BABYSEG_HOME', file=sys.stderr)
+        exit(1)
+
+    # Defaults.
+    home = pathlib.Path(home)
+
+    def latest(folder, pattern):
+        try:
+            with os.scandir(folder) as it:
+                f = (x.name for x in it if fnmatch.fnmatchcase(x.name, pattern))
+                f = max(f, default=None)
+        except FileNotFoundError:
+            return None
+        return None if f is None else folder / f
+
+    config = latest(home / 'config', 'babyseg.*.json')
+    checkpoint = latest(home / 'checkpoints', 'babyseg.*.pt')
+    p = parser(config, checkpoint)
+
     if argv is None:
         argv = sys.argv[1:]
 
@@ -69,8 +107,15 @@ def main(argv=None):
         p.print_usage()
         exit(0)
 
-    # Device.
+    # Model. Refuse to run without weights rather than segment with an
+    # untrained network.
     arg = vars(p.parse_args(argv))
+    if arg['config'] is None:
+        p.error('cannot find default model JSON file, specify -c')
+    if arg['checkpoint'] is None:
+        p.error('cannot find default model weights, specify -k')
+
+    # Device.
     if arg.pop('gpu', False):
         arg['device'] = 'cuda'
 
@@ -13,7 +13,6 @@ import os
 import pathlib
 import shutil
 import signal
-import subprocess
 import sys
 
 
@@ -40,7 +39,7 @@ def env(key, default):
         return value
     return default
 
-host = env('BABYSEG_MNT', os.getcwd())
+host = env('BABYSEG_MNT', '.')
 tag = env('BABYSEG_TAG', tag)
 sif = env('BABYSEG_SIF', sif)
 sif = pathlib.Path(sif) / f'babyseg_{tag}.sif'
@@ -72,7 +71,8 @@ else:
 # Bind path and image URL. Mount BABYSEG_MNT as /mnt inside the container,
 # which we made the working directory when building the image. Docker and
 # Podman require absolute paths.
-host = pathlib.Path(host).absolute()
+host = os.path.abspath(host)
+bind = f'{host}:/mnt'
 print(f'Will bind /mnt in container to BABYSEG_MNT="{host}"')
 
 image = f'freesurfer/babyseg:{tag}'
@@ -87,11 +87,12 @@ if tool.name != 'docker':
 # as for Docker, then these would get remapped according to /etc/subuid
 # outside, causing permission problems. Pretty-print help text with `-t`.
 if tool.name in ('docker', 'podman'):
-    arg = ('run', '--rm', '-v', f'{host}:/mnt', image)
+    arg = ['run', '--rm', '-v', bind]
     if sys.stdout.isatty():
-        arg = (*arg[:-1], '-t', arg[-1])
+        arg.append('-t')
     if 'docker' in tool.name:
-        arg = (*arg[:-1], '-u', f'{os.getuid()}:{os.getgid()}', arg[-1])
+        arg.extend(('-u', f'{os.getuid()}:{os.getgid()}'))
+    arg.append(image)
 
 
 # For Apptainer or Singularity, the users inside and outside the container are
@@ -102,6 +103,7 @@ elif tool.name in ('apptainer', 'singularity'):
         exit(1)
 
     if not sif.exists():
+        import subprocess
         call = (tool, 'pull', sif, image)
         print(f'Cannot find image "{sif}", pulling it')
         print('Command:', *call)
@@ -109,17 +111,19 @@ elif tool.name in ('apptainer', 'singularity'):
         if p.returncode:
             exit(p.returncode)
 
-    arg = ('run', '--pwd', '/mnt', '-e', '-B', f'{host}:/mnt', sif)
+    arg = ['run']
     if '-cu' in sif.name:
-        arg = (arg[0], '--nv', *arg[1:])
+        arg.append('--nv')
+    arg.extend(('--pwd', '/mnt', '-e', '-B', bind, sif))
 
 else:
     print(f'Cannot set up unknown container tool "{tool}"', file=sys.stderr)
     exit(1)
 
 
-# Summary, launch.
+# Summary, launch. Replace the Python process with the container tool, which
+# receives signals and determines the exit code directly. Flush first, as
+# buffered output would be lost.
 print('Command:', tool, *arg)
-print('BabySeg arguments:', *sys.argv[1:])
-p = subprocess.run((tool, *arg, *sys.argv[1:]))
-exit(p.returncode)
+print('BabySeg arguments:', *sys.argv[1:], flush=True)
+os.execv(tool, (tool, *arg, *sys.argv[1:]))
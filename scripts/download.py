@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 """Download BabySeg checkpoints and test data."""
 
+import concurrent.futures
+import json
 import logging
+import os
 import pathlib
 import re
+import shutil
+import urllib.error
 import urllib.parse
 import urllib.request
 
@@ -11,44 +16,153 @@ import urllib.request
 # Keep trailing slash for `urljoin`.
 REMOTE = 'https://surfer.nmr.mgh.harvard.edu/docs/babyseg/'
 output = {'.pt': 'checkpoints', '.nii.gz': 'data'}
+HREF = re.compile(
+    r'href\s*=\s*["\']?([^"\' >]+\.(?:pt|nii\.gz))(?=["\' >])',
+    flags=re.IGNORECASE,
+)
+validators = {'ETag': 'If-None-Match', 'Last-Modified': 'If-Modified-Since'}
 logger = logging.getLogger(__name__)
 
 
+def etag(path):
+    """Return the path of the file storing HTTP validators for a download.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Downloaded file.
+
+    Returns
+    -------
+    pathlib.Path
+        Sidecar JSON file next to the download.
+
+    """
+    return path.with_name(f'{path.name}.etag')
+
+
+def cached(path):
+    """Read the HTTP validators stored for a download.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Downloaded file.
+
+    Returns
+    -------
+    dict
+        Validator headers. Empty if missing or unreadable.
+
+    """
+    try:
+        return json.loads(etag(path).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
 def main():
     """Download BabySeg files."""
     logging.info('retrieving file list from "%s"', REMOTE)
     with urllib.request.urlopen(REMOTE) as r:
-        site = r.read().decode(encoding='utf-8')
+        charset = r.headers.get_content_charset() or 'utf-8'
+        site = r.read().decode(encoding=charset)
 
-    regex = r'href\s*=\s*["\']?([^"\' >]+\.(?:pt|nii.gz))(?=["\' >])'
-    files = re.findall(regex, site, flags=re.IGNORECASE)
-    files = sorted({urllib.parse.urljoin(REMOTE, f) for f in files})
+    files = (urllib.parse.urljoin(REMOTE, m[1]) for m in HREF.finditer(site))
+    files = list(dict.fromkeys(files))
     if not files:
         logging.error('cannot find any files to download')
         exit(1)
 
-    # Downloads.
-    for i, f in enumerate(files, start=1):
-        logging.info('processing file %d of %d at "%s"', i, len(files), f)
-
-        name = pathlib.Path(urllib.parse.urlparse(f).path).name
+    # Destinations. Links to different URLs can share a file name, and only
+    # the first may write to it, as concurrent downloads would interleave.
+    todo = {}
+    for f in files:
+        name = urllib.parse.urlparse(f).path.rsplit('/', maxsplit=1)[-1]
         for ext, d in output.items():
             if name.endswith(ext):
                 out = pathlib.Path(d) / name
-                out.parent.mkdir(exist_ok=True)
                 break
 
         else:
             logging.error('unexpected file suffix for "%s"', f)
             exit(1)
 
-        if out.exists():
+        if out in todo:
+            logging.info('skipping duplicate destination "%s"', out)
+            continue
+
+        # Without validators from a previous download, keep existing files.
+        if out.exists() and not cached(out):
             logging.info('skipping file existing at "%s"', out)
             continue
 
-        urllib.request.urlretrieve(f, out)
+        todo[out] = f
+
+    for d in {out.parent for out in todo}:
+        d.mkdir(exist_ok=True)
+
+    # Downloads.
+    def fetch(f, out):
+        # Revalidate complete files. Resume partial downloads, unless the
+        # remote file changed, in which case the server sends all of it.
+        part = out.with_name(f'{out.name}.part')
+        headers = {}
+        if out.exists():
+            cache = cached(out)
+            for k, v in validators.items():
+                if k in cache:
+                    headers[v] = cache[k]
+
+        elif part.exists():
+            cache = cached(part)
+            check = cache.get('ETag', cache.get('Last-Modified'))
+            if check:
+                headers['Range'] = f'bytes={part.stat().st_size}-'
+                headers['If-Range'] = check
+
+        try:
+            req = urllib.request.Request(f, headers=headers)
+            with urllib.request.urlopen(req) as r:
+                cache = {k: r.headers[k] for k in validators if k in r.headers}
+                etag(part).unlink(missing_ok=True)
+                if cache:
+                    etag(part).write_text(json.dumps(cache))
+                resume = r.status == 206
+                if resume:
+                    logging.info('resuming download to "%s"', out)
+                with open(part, 'ab' if resume else 'wb') as o:
+                    shutil.copyfileobj(r, o, length=1 << 20)
+
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                logging.info('keeping unchanged file at "%s"', out)
+                return
+            if e.code != 416:
+                raise
+
+            # Range starts at or beyond the end. Keep complete partial files.
+            total = e.headers.get('Content-Range', '').rpartition('/')[-1]
+            if total != str(part.stat().st_size):
+                logging.info('restarting download to "%s"', out)
+                part.unlink()
+                etag(part).unlink(missing_ok=True)
+                return fetch(f, out)
+            cache = cached(part)
+
+        # Store validators only if the server sent any. Otherwise, skip the
+        # existing file next time, as we cannot revalidate it.
+        os.replace(part, out)
+        if cache:
+            os.replace(etag(part), etag(out))
+        else:
+            etag(out).unlink(missing_ok=True)
         logging.info('saved file to "%s"', out)
 
+    logging.info('requesting %d of %d files', len(todo), len(files))
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        list(pool.map(fetch, todo.values(), todo))
+
 
 if __name__ == '__main__':
     logging.basicConfig(format='%(levelname)s: %(message)s', level='INFO')
@@ -60,3 +60,47 @@ def test_image_missing(setup_env, capteesys):
     f = capteesys.readouterr()
     assert 'required: image' in f.err
     assert e.value.code != 0
+
+
+def test_defaults_missing(monkeypatch, tmp_path, capteesys):
+    """Test if lacking default model files raises an error."""
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'checkpoints').mkdir()
+    (tmp_path / 'checkpoints' / 'other.pt').touch()
+    monkeypatch.setenv('BABYSEG_HOME', str(tmp_path))
+    with pytest.raises(SystemExit) as e:
+        docker.entrypoint.main(argv=['in.nii.gz'])
+
+    f = capteesys.readouterr()
+    assert 'specify -c' in f.err
+    assert e.value.code != 0
+
+    # Expect error on missing weights even with a configuration.
+    with pytest.raises(SystemExit) as e:
+        docker.entrypoint.main(argv=['in.nii.gz', '-c', 'model.json'])
+
+    f = capteesys.readouterr()
+    assert 'specify -k' in f.err
+    assert e.value.code != 0
+
+
+def test_defaults_no_folders(monkeypatch, tmp_path, capteesys):
+    """Test if missing model folders raise an error instead of crashing."""
+    monkeypatch.setenv('BABYSEG_HOME', str(tmp_path / 'missing'))
+    with pytest.raises(SystemExit) as e:
+        docker.entrypoint.main(argv=['in.nii.gz'])
+
+    f = capteesys.readouterr()
+    assert 'specify -c' in f.err
+    assert e.value.code != 0
+
+
+def test_defaults_no_folders_help(monkeypatch, tmp_path, capteesys):
+    """Test printing help text without model folders."""
+    monkeypatch.setenv('BABYSEG_HOME', str(tmp_path / 'missing'))
+    with pytest.raises(SystemExit) as e:
+        docker.entrypoint.main(argv=['-h'])
+
+    f = capteesys.readouterr()
+    assert 'positional arguments' in f.out
+    assert e.value.code == 0
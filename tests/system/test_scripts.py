@@ -1,7 +1,15 @@
 """Tests for scripts."""
 
+import hashlib
+import http.server
+import importlib.util
 import pathlib
+import pytest
 import subprocess
+import threading
+
+
+DOWNLOAD = pathlib.Path(__file__).parents[2] / 'scripts' / 'download.py'
 
 
 def test_download(tmp_path):
@@ -20,3 +28,172 @@ def test_download(tmp_path):
     t = f.stat().st_mtime
     assert run() == 0
     assert f.stat().st_mtime == t
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    """Serve files locally with ETag and range support, and load the script.
+
+    Yields the script module, a dictionary of served files by name, and a
+    list of requests as tuples of path, request headers, and status code.
+
+    """
+    files = {
+        'babyseg.1.pt': bytes(range(256)) * 64,
+        'image.nii.gz': b'image' * 100,
+    }
+    log = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.lstrip('/')
+            if not name:
+                body = ''.join(f'<a href="{f}">{f}</a>' for f in files)
+                return self.reply(200, body.encode())
+
+            data = files[name]
+            tag = f'"{hashlib.sha256(data).hexdigest()}"'
+            head = {'ETag': tag}
+            if self.headers.get('If-None-Match') == tag:
+                return self.reply(304, headers=head)
+
+            # Honor ranges only if the file has not changed.
+            rng = self.headers.get('Range')
+            if rng and self.headers.get('If-Range') == tag:
+                start = int(rng.removeprefix('bytes=').rstrip('-'))
+                if start >= len(data):
+                    head = {'Content-Range': f'bytes */{len(data)}'}
+                    return self.reply(416, headers=head)
+                end = len(data) - 1
+                head['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+                return self.reply(206, data[start:], head)
+
+            self.reply(200, data, head)
+
+        def reply(self, code, body=b'', headers=None):
+            log.append((self.path, dict(self.headers), code))
+            self.send_response(code)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    # Script module.
+    spec = importlib.util.spec_from_file_location('download', DOWNLOAD)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, 'REMOTE', f'http://127.0.0.1:{httpd.server_port}/')
+    monkeypatch.chdir(tmp_path)
+
+    yield module, files, log
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def codes(log):
+    """Return status codes of file requests by file name."""
+    return {path.lstrip('/'): code for path, _, code in log if path != '/'}
+
+
+def test_download_revalidate(server):
+    """Test revalidating downloads with conditional requests."""
+    module, files, log = server
+    out = pathlib.Path('checkpoints', 'babyseg.1.pt')
+
+    # Expect full downloads with validators stored alongside.
+    module.main()
+    assert codes(log) == {f: 200 for f in files}
+    assert out.read_bytes() == files[out.name]
+    assert module.cached(out)
+
+    # Expect unchanged files left untouched.
+    log.clear()
+    t = out.stat().st_mtime_ns
+    module.main()
+    assert codes(log) == {f: 304 for f in files}
+    assert out.stat().st_mtime_ns == t
+
+    # Expect changed files downloaded again.
+    log.clear()
+    files[out.name] = b'new'
+    module.main()
+    assert codes(log)[out.name] == 200
+    assert out.read_bytes() == b'new'
+
+
+def test_download_resume(server):
+    """Test resuming partial downloads."""
+    module, files, log = server
+    out = pathlib.Path('data', 'image.nii.gz')
+    part = out.with_name(f'{out.name}.part')
+
+    # Validators of the current remote file.
+    module.main()
+    cache = module.etag(out).read_text()
+    data = files[out.name]
+
+    # Expect a range request appending to the partial file.
+    out.unlink()
+    part.write_bytes(data[:100])
+    module.etag(part).write_text(cache)
+    module.etag(out).unlink()
+    log.clear()
+    module.main()
+    _, headers, code = next(x for x in log if x[0] == f'/{out.name}')
+    assert code == 206
+    assert headers['Range'] == 'bytes=100-'
+    assert out.read_bytes() == data
+    assert not part.exists()
+    assert not module.etag(part).exists()
+
+    # Expect a complete partial file moved into place after error 416.
+    out.rename(part)
+    module.etag(out).rename(module.etag(part))
+    log.clear()
+    module.main()
+    assert codes(log)[out.name] == 416
+    assert out.read_bytes() == data
+    assert module.etag(out).read_text() == cache
+
+    # Expect an oversized partial file to be replaced.
+    out.unlink()
+    part.write_bytes(data * 2)
+    module.etag(out).rename(module.etag(part))
+    log.clear()
+    module.main()
+    assert list(codes(log).values()).count(200) == 1
+    assert out.read_bytes() == data
+
+
+def test_download_stale_part(server):
+    """Test replacing partial downloads when the remote file changed."""
+    module, files, log = server
+    out = pathlib.Path('checkpoints', 'babyseg.1.pt')
+    part = out.with_name(f'{out.name}.part')
+
+    out.parent.mkdir()
+    part.write_bytes(b'old')
+    module.etag(part).write_text('{"ETag": "\\"old\\""}')
+    module.main()
+    assert codes(log)[out.name] == 200
+    assert out.read_bytes() == files[out.name]
+
+
+def test_download_truncated_sidecar(server):
+    """Test if an unreadable sidecar counts as absent."""
+    module, _, log = server
+    out = pathlib.Path('checkpoints', 'babyseg.1.pt')
+
+    out.parent.mkdir()
+    out.write_bytes(b'existing')
+    module.etag(out).write_text('{"ETag": ')
+    module.main()
+    assert out.name not in codes(log)
+    assert out.read_bytes() == b'existing'
@@ -1,81 +1,115 @@
 """Tests for the wrapper script."""
 
+import functools
 import os
 import pathlib
 import pytest
+import shutil
 import subprocess
 
 
+# Mock container tools are shell scripts.
+if not shutil.which('sh'):
+    pytest.skip('no POSIX shell', allow_module_level=True)
+
+
+WRAPPER = pathlib.Path(__file__).parents[2] / 'docker' / 'wrapper.py'
 TOOLS_SIF = {'apptainer', 'singularity'}
 TOOLS_ALL = {'docker', 'podman', *TOOLS_SIF}
+DOCKER_NAME = os.getenv('BABYSEG_DOCKER_NAME')
+SIF_NAME = os.path.basename(DOCKER_NAME or '')
+PATH = os.getenv('PATH')
+USER = f'{os.getuid()}:{os.getgid()}'
+CWD_MNT = f'{os.getcwd()}:/mnt'
+TAG = '0.0'
+MNT = '/a/b/c'
+TOOL_SCRIPT = '#!/bin/sh\necho "$0" "$@" | tee -a "{log}"\nexit {code:d}\n'
+
+
+def create_tool(
+    monkeypatch,
+    folder,
+    name,
+    set_path=True,
+    set_tool=True,
+    code=0,
+):
+    """Create a mock container tool that logs calls."""
+    # Empty file.
+    log = folder / f'{name}.log'
+    log.touch()
+
+    # Mock tool.
+    tool = folder / name
+    tool.write_text(TOOL_SCRIPT.format(log=log, code=code))
+    tool.chmod(0o755)
+
+    # Environment.
+    if set_path:
+        monkeypatch.setenv('PATH', f'{folder}:{PATH}')
+    if set_tool:
+        monkeypatch.setenv('BABYSEG_TOOL', tool.name)
+
+    return tool, log
 
 
 @pytest.fixture
 def mock_tool(monkeypatch, tmp_path):
     """Return factory to create a mock container tool that logs calls."""
-    def f(name, set_path=True, set_tool=True, code=0):
-        # Empty file.
-        log = tmp_path / f'{name}.log'
-        log.write_text('')
-
-        # Mock tool.
-        tool = tmp_path / name
-        tool.write_text(
-            '#!/bin/sh\n'
-            f'echo "$0" "$@" | tee -a "{log}"\n'
-            f'exit {code:d}\n'
-        )
-        tool.chmod(0o755)
-
-        # Environment.
-        if set_path:
-            path = os.getenv('PATH')
-            monkeypatch.setenv('PATH', f'{tmp_path}:{path}')
-        if set_tool:
-            monkeypatch.setenv('BABYSEG_TOOL', tool.name)
-
-        return tool, log
-
-    return f
+    return functools.partial(create_tool, monkeypatch, tmp_path)
 
 
 def run_wrapper():
     """Run the container script without relying on `PATH`."""
-    return subprocess.run('docker/wrapper.py')
+    return subprocess.run(WRAPPER)
 
 
 def test_environment(monkeypatch):
     """Test the test environment."""
-    name = os.getenv('BABYSEG_DOCKER_NAME')
-    assert name is not None
-    assert not name.startswith('/')
-    assert not name.endswith('/')
-    assert '/' in name
+    assert DOCKER_NAME is not None
+    assert not DOCKER_NAME.startswith('/')
+    assert not DOCKER_NAME.endswith('/')
+    assert '/' in DOCKER_NAME
 
 
 def construct_sif_file(folder, tag, touch=False):
     """Construct SIF file path from folder, tag, and `BABYSEG_DOCKER_NAME`."""
-    f = os.getenv('BABYSEG_DOCKER_NAME')
-    f = pathlib.Path(f).name
-    f = pathlib.Path(folder) / f'{f}_{tag}.sif'
+    f = pathlib.Path(folder) / f'{SIF_NAME}_{tag}.sif'
     if touch:
         f.touch()
 
     return f
 
 
-@pytest.mark.parametrize('name', TOOLS_ALL)
-def test_tool_auto(mock_tool, name):
-    """Test auto-selecting tools from `PATH`."""
-    tool, log = mock_tool(name)
+@pytest.fixture(scope='module')
+def calls(tmp_path_factory):
+    """Run the wrapper once per tool, returning tool, exit code, and log.
 
-    # Expect no log initially.
-    assert not log.read_text()
-    assert not run_wrapper().returncode
-    assert log.read_text().startswith(str(tool))
+    Each tool is found via `PATH`, has an existing SIF file, and binds `MNT`.
+
+    """
+    out = {}
+    for name in TOOLS_ALL:
+        with pytest.MonkeyPatch.context() as mp:
+            tool, log = create_tool(mp, tmp_path_factory.mktemp(name), name)
+            sif = construct_sif_file(tool.parent, TAG, touch=True)
+            mp.setenv('BABYSEG_TAG', TAG)
+            mp.setenv('BABYSEG_SIF', str(sif.parent))
+            mp.setenv('BABYSEG_MNT', MNT)
+            out[name] = (tool, run_wrapper().returncode, log.read_text())
+
+    return out
+
+
+@pytest.mark.parametrize('name', sorted(TOOLS_ALL))
+def test_tool_auto(calls, name):
+    """Test auto-selecting tools from `PATH`."""
+    tool, code, log = calls[name]
+    assert not code
+    assert log.startswith(str(tool))
 
 
-@pytest.mark.parametrize('name', TOOLS_ALL)
+@pytest.mark.parametrize('name', sorted(TOOLS_ALL))
 def test_tool_absolute(mock_tool, monkeypatch, name):
     """Test running a tool from absolute path when not in `PATH`."""
     tool, log = mock_tool(name, set_path=False, set_tool=False)
@@ -97,21 +131,15 @@ def test_tool_unknown(mock_tool):
     assert run_wrapper().returncode
 
 
-@pytest.mark.parametrize('name', TOOLS_ALL)
-def test_user(mock_tool, monkeypatch, name):
+@pytest.mark.parametrize('name', sorted(TOOLS_ALL))
+def test_user(calls, name):
     """Test which tools specify user and group."""
-    tag = '0.0'
-    tool, log = mock_tool(name)
-
-    # Point to existing SIF file.
-    sif = construct_sif_file(tool.parent, tag, touch=True)
-    monkeypatch.setenv('BABYSEG_TAG', tag)
-    monkeypatch.setenv('BABYSEG_SIF', str(sif.parent))
-    assert not run_wrapper().returncode
+    _, code, log = calls[name]
+    assert not code
 
     # Expect UID, GID setting only for Docker.
     is_docker = name == 'docker'
-    is_user = f'{os.getuid()}:{os.getgid()}' in log.read_text().split()
+    is_user = USER in log.split()
     assert is_user == is_docker
 
 
@@ -126,11 +154,11 @@ def test_docker_run(mock_tool, monkeypatch):
     assert out[0] == str(tool)
     assert out[1] == 'run'
     assert '--rm' in out
-    assert f'{os.getcwd()}:/mnt' in out
-    assert out[-1] == os.getenv('BABYSEG_DOCKER_NAME') + f':{tag}'
+    assert CWD_MNT in out
+    assert out[-1] == f'{DOCKER_NAME}:{tag}'
 
 
-@pytest.mark.parametrize('name', TOOLS_SIF)
+@pytest.mark.parametrize('name', sorted(TOOLS_SIF))
 def test_sif_directory_error(mock_tool, monkeypatch, name):
     """Test if not pointing `BABYSEG_SIF` to a directory raises an error."""
     tool, log = mock_tool(name)
@@ -152,7 +180,7 @@ def test_sif_directory_error(mock_tool, monkeypatch, name):
     assert run_wrapper().returncode == 0
 
 
-@pytest.mark.parametrize('name', TOOLS_SIF)
+@pytest.mark.parametrize('name', sorted(TOOLS_SIF))
 def test_sif_file_absent(mock_tool, monkeypatch, name):
     """Test behavior when the SIF file is missing and `BABYSEG_SIF` unset."""
     tag = 'absent'
@@ -162,10 +190,9 @@ def test_sif_file_absent(mock_tool, monkeypatch, name):
     assert not p.returncode
 
     # Expect default SIF path alongside script.
-    image = os.getenv('BABYSEG_DOCKER_NAME')
-    d = pathlib.Path(p.args).absolute().parent
+    d = WRAPPER.parent
     sif = construct_sif_file(d, tag, touch=False)
-    hub = f'docker://{image}:{tag}'
+    hub = f'docker://{DOCKER_NAME}:{tag}'
 
     # Expect two calls; `pull` first.
     out = log.read_text().splitlines()
@@ -173,7 +200,7 @@ def test_sif_file_absent(mock_tool, monkeypatch, name):
     assert out[0].split() == [str(tool), 'pull', str(sif), hub]
 
 
-@pytest.mark.parametrize('name', TOOLS_SIF)
+@pytest.mark.parametrize('name', sorted(TOOLS_SIF))
 def test_sif_file_present(mock_tool, monkeypatch, name):
     """Test behavior when the SIF file exists."""
     tag = '9.0'
@@ -185,46 +212,42 @@ def test_sif_file_present(mock_tool, monkeypatch, name):
     assert not p.returncode
 
     # Expect `run` call  only.
-    assert len(log.read_text().splitlines()) == 1
+    text = log.read_text()
+    assert len(text.splitlines()) == 1
 
-    run = log.read_text().split()
+    run = text.split()
     assert run[:2] == [str(tool), 'run']
     assert '--pwd' in run
     assert '/mnt' in run
-    assert f'{os.getcwd()}:/mnt' in run
+    assert CWD_MNT in run
     assert run[-1] == str(sif)
 
 
-@pytest.mark.parametrize('name', TOOLS_ALL)
-def test_bind_mount(mock_tool, monkeypatch, name):
+@pytest.mark.parametrize('name', sorted(TOOLS_ALL))
+def test_bind_mount(calls, name):
     """Test explicit bind mount of `/mnt` inside container."""
-    d = '/a/b/c'
-    _, log = mock_tool(name)
-    monkeypatch.setenv('BABYSEG_MNT', d)
-
-    assert not run_wrapper().returncode
-    assert f'{d}:/mnt' in log.read_text().split()
+    _, code, log = calls[name]
+    assert not code
+    assert f'{MNT}:/mnt' in log.split()
 
 
-@pytest.mark.parametrize('name', TOOLS_SIF)
-def test_gpu(mock_tool, monkeypatch, name):
+@pytest.mark.parametrize('tag', ('1.2.3-cu130', '9.9'))
+@pytest.mark.parametrize('name', sorted(TOOLS_SIF))
+def test_gpu(mock_tool, monkeypatch, name, tag):
     """Test enabling GPU support via image tag."""
     tool, log = mock_tool(name)
+    construct_sif_file(tool.parent, tag, touch=True)
     monkeypatch.setenv('BABYSEG_SIF', str(tool.parent))
+    monkeypatch.setenv('BABYSEG_TAG', tag)
+    assert not run_wrapper().returncode
 
     # Expect GPU enabled when `-cu` in tag.
-    for tag in ('1.2.3-cu130', '9.9'):
-        log.write_text('')
-        sif = construct_sif_file(os.getenv('BABYSEG_SIF'), tag, touch=True)
-        monkeypatch.setenv('BABYSEG_TAG', tag)
-        assert not run_wrapper().returncode
-
-        is_gpu_image = '-cu' in tag
-        is_gpu_enabled = '--nv' in log.read_text().split()
-        assert is_gpu_image == is_gpu_enabled
+    is_gpu_image = '-cu' in tag
+    is_gpu_enabled = '--nv' in log.read_text().split()
+    assert is_gpu_image == is_gpu_enabled
 
 
-@pytest.mark.parametrize('name', TOOLS_SIF)
+@pytest.mark.parametrize('name', sorted(TOOLS_SIF))
 def test_error_code_on_pull(mock_tool, monkeypatch, name):
     """Test if failure on SIF image `pull` returns the correct code."""
     code = 7
@@ -233,7 +256,7 @@ def test_error_code_on_pull(mock_tool, monkeypatch, name):
     assert run_wrapper().returncode == code
 
 
-@pytest.mark.parametrize('name', TOOLS_ALL - TOOLS_SIF)
+@pytest.mark.parametrize('name', sorted(TOOLS_ALL - TOOLS_SIF))
 def test_error_code_on_run(mock_tool, monkeypatch, name):
     """Test if failure on `run` returns the correct code."""
     code = 13
@@ -2,11 +2,14 @@
 
 import babyseg
 import json
-import katy
+import math
 import pathlib
 import pytest
 
 
+katy = pytest.importorskip('katy')
+
+
 def test_load_default():
     """Test loading configuration defaults."""
     y = katy.io.load(babyseg.config.DEFAULTS)
@@ -54,6 +57,30 @@ def test_load_files_replace(tmp_path):
     assert c['a'] == data_2['a']
 
 
+def test_load_files_nested(tmp_path):
+    """Test merging and clearing nested settings."""
+    f_1 = tmp_path / '1.json'
+    f_2 = tmp_path / '2.json'
+
+    katy.io.save({'a': {'b': {'c': 1, 'd': 2}}, 'e': {'f': 3}}, f_1)
+    katy.io.save({'a': {'b': {'c': 4}}, 'e': {'g': 5, 'clear': True}}, f_2)
+
+    # Expect deep merge, except for cleared entries.
+    c = babyseg.config.load(f_1, f_2)
+    assert c['a'] == {'b': {'c': 4, 'd': 2}}
+    assert c['e'] == {'g': 5}
+
+
+def test_load_independent(tmp_path):
+    """Test if changing loaded settings leaves later loads unaffected."""
+    f = tmp_path / 'data.json'
+    katy.io.save({'a': {'b': 1}}, f)
+
+    c = babyseg.config.load(f)
+    c['a']['b'] = 2
+    assert babyseg.config.load(f)['a']['b'] == 1
+
+
 def test_qualify_path_type():
     """Test the return type when qualifying a path."""
     for path in (pathlib.Path('x'), pathlib.Path('/usr'), 'a/b', '/a/b'):
@@ -97,6 +124,23 @@ def test_load_invalid(tmp_path):
         babyseg.config.load(f)
 
 
+def test_read_json(tmp_path):
+    """Test parsing JSON files."""
+    f = tmp_path / 'data.json'
+    data = {'a': [1, 2.5, 'c'], 'b': None}
+    katy.io.save(data, f)
+    assert babyseg.config.read_json(f) == data
+
+
+def test_read_json_fallback(tmp_path):
+    """Test parsing JSON with a byte order mark and non-finite values."""
+    f = tmp_path / 'data.json'
+    f.write_bytes(b'\xef\xbb\xbf{"a": NaN, "b": Infinity}')
+    out = babyseg.config.read_json(f)
+    assert math.isnan(out['a'])
+    assert out['b'] == math.inf
+
+
 def test_build_args():
     """Test building a partial function with positional arguments."""
     f = babyseg.config.build(lambda *args: args, 1, 2)
@@ -127,3 +171,17 @@ def test_build_object():
     """Test building a object from a string."""
     f = babyseg.config.build('json.JSONDecodeError', 'hi', doc='doc', pos=0)
     assert isinstance(f, json.JSONDecodeError)
+
+
+def test_argparse_types():
+    """Test casting option values when parsing."""
+    c = {'a': {}}
+    babyseg.config.argparse(c, 'a:b=true', 'a:c=false', 'd=1', 'e=.5', 'f=x')
+    assert c == {'a': {'b': True, 'c': False}, 'd': 1, 'e': 0.5, 'f': 'x'}
+
+
+def test_argparse_invalid():
+    """Test if parsing options of invalid format raises an error."""
+    for option in ('a', 'a=b=c'):
+        with pytest.raises(ValueError):
+            babyseg.config.argparse({}, option)
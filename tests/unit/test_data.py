@@ -0,0 +1,39 @@
+"""Test data module."""
+
+import babyseg
+import json
+import pytest
+
+
+pl = pytest.importorskip('polars')
+pytest.importorskip('katy')
+
+
+def test_save_split(monkeypatch, tmp_path):
+    """Test saving a split relative to the working directory."""
+    df = pl.DataFrame({
+        'sample': ['s1', 's1', 's2', 's2'],
+        'contrast': ['t1', 't2', 't1', 'pd'],
+        'out_image': ['a.nii.gz', 'b.nii.gz', 'c.nii.gz', 'd.nii.gz'],
+        'age': [1.234, 1.234, 2.0, 2.0],
+        'unit': ['month', 'month', 'year', 'year'],
+    })
+    for sample, image in df.select('sample', 'out_image').iter_rows():
+        (tmp_path / sample).mkdir(exist_ok=True)
+        (tmp_path / sample / image).touch()
+        (tmp_path / sample / 'labels.nii.gz').touch()
+
+    # Expect only complete samples, folders joined without leading `./`.
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'split.json'
+    contrast = ('t1', 't2')
+    babyseg.data.save_split(df, '.', contrast, 'labels.nii.gz', path)
+    assert json.loads(path.read_text()) == [{
+        'folder': 's1',
+        'labels': 'labels.nii.gz',
+        'images': ['t1', 't2'],
+        'age': 1.23,
+        'unit': 'month',
+        't1': 'a.nii.gz',
+        't2': 'b.nii.gz',
+    }]
@@ -2,7 +2,9 @@
 
 import babyseg
 import pytest
-import torch
+
+
+torch = pytest.importorskip('torch')
 
 
 def test_select_dtype_values():
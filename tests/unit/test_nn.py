@@ -0,0 +1,47 @@
+"""Test neural network module."""
+
+import babyseg
+import pytest
+
+
+torch = pytest.importorskip('torch')
+kt = pytest.importorskip('katy')
+
+
+@pytest.mark.parametrize('dim', [1, 2, 3])
+def test_group_conv_single(dim):
+    """Test if a single-group convolution matches the grouped computation."""
+    conv = babyseg.nn.GroupConv(dim, 2, 4, kernel_size=3, padding='same')
+    x = torch.rand(2, 1, 2, *[8] * dim)
+
+    # Expect the average of both convolutions, with the mean being the input.
+    y = x.squeeze(1)
+    y = 0.5 * (conv.conv_b(y) + conv.conv_m(y))
+    assert torch.allclose(conv(x), y.unsqueeze(1), atol=1e-6)
+
+
+def test_normalize_all():
+    """Test if sampling all voxels matches the exact normalization."""
+    clip = (0.01, 0.99)
+    x = torch.rand(2, 3, 1, 8, 8, 8)
+    sample = x[0, 0].numel()
+    model = babyseg.nn.GroupNet(enc=(2,), dec=(2,), clip=clip, sample=sample)
+
+    y = kt.utility.normalize(x.clone(), range(2, x.ndim), *clip)
+    assert torch.allclose(model.normalize(x.clone()), y, atol=1e-6)
+
+
+def test_normalize_sample():
+    """Test if sampled quantiles are close to those of the full volume."""
+    clip = (0.01, 0.99)
+    model = babyseg.nn.GroupNet(enc=(2,), dec=(2,), clip=clip, sample=4096)
+
+    # Conformed shape with zero-padded edge, as after cropping or padding.
+    x = torch.zeros(1, 1, 1, 64, 64, 64)
+    x[..., 8:-8, 8:-8, 8:-8] = torch.rand(48, 48, 48) * 100 + 1
+
+    # Exact normalization from all voxels.
+    q = torch.tensor(clip)
+    low, upp = torch.quantile(x.flatten(), q)
+    y = x.clamp(low, upp).sub(low).div(upp - low)
+    assert torch.allclose(model.normalize(x.clone()), y, atol=0.02)